@@ -11,7 +11,13 @@
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_ROOT="$(cd "$SCRIPT_DIR/../.." && pwd)"
-TEST_DIR="${FQC_PERF_TEST_DIR:-$(mktemp -d)}"
+FQC_PERF_TMPFS="${FQC_PERF_TMPFS:-0}"
+# Opt-in: keep fixtures and outputs on tmpfs so disk I/O stays out of the timings.
+if [[ "$FQC_PERF_TMPFS" == "1" && -d /dev/shm && -w /dev/shm ]]; then
+    TEST_DIR="${FQC_PERF_TEST_DIR:-$(mktemp -d -p /dev/shm)}"
+else
+    TEST_DIR="${FQC_PERF_TEST_DIR:-$(mktemp -d)}"
+fi
 FQC_BIN="${FQC_BIN:-$PROJECT_ROOT/build/clang-release/src/fqc}"
 RESULTS_DIR="${RESULTS_DIR:-$TEST_DIR/benchmark_results}"
 FQC_PERF_SIZES="${FQC_PERF_SIZES:-1 2}"
@@ -20,6 +26,8 @@
 FQC_PERF_KEEP_TEMP="${FQC_PERF_KEEP_TEMP:-0}"
 FQC_PERF_ENFORCE_SLA="${FQC_PERF_ENFORCE_SLA:-0}"
 FQC_PERF_REPEATS="${FQC_PERF_REPEATS:-3}"
+FQC_PERF_WARMUP="${FQC_PERF_WARMUP:-1}"
+FQC_PERF_CPUSET="${FQC_PERF_CPUSET:-}"
 FQC_PERF_MIN_COMPRESS_MIB_S="${FQC_PERF_MIN_COMPRESS_MIB_S:-50}"
 FQC_PERF_MIN_DECOMPRESS_MIB_S="${FQC_PERF_MIN_DECOMPRESS_MIB_S:-100}"
 
@@ -43,7 +51,22 @@ log_bench()
     echo -e "${YELLOW}[BENCH]${NC} $*"
 }
 
+# Report a failed fqc run with a bounded prefix of its captured stderr.
+report_failure() {
+    local name="$1"
+    local operation="$2"
+    local stderr_file="$3"
+
+    echo "Error: $operation failed for benchmark '$name'" >&2
+    head -c 200 "$stderr_file" >&2
+    echo "" >&2
+}
+
 median_value() {
+    if (($# == 1)); then
+        echo "$1"
+        return
+    fi
     printf '%s\n' "$@" | sort -n | awk '
         { values[NR] = $1 }
         END {
@@ -51,12 +74,24 @@ median_value()
             if (NR % 2 == 1) {
                 print values[middle]
             } else {
-                print (values[middle] + values[middle + 1]) / 2
+                printf "%.1f\n", (values[middle] + values[middle + 1]) / 2
             }
         }
     '
 }
 
+# Fail fast instead of dividing by a median below the timer resolution.
+require_positive_time() {
+    local name="$1"
+    local operation="$2"
+    local elapsed_us="$3"
+
+    if ((${elapsed_us%.*} <= 0)); then
+        echo "Error: $operation time for benchmark '$name' is below timer resolution" >&2
+        return 1
+    fi
+}
+
 # Generate test FASTQ with specific size
 generate_fastq() {
     local file="$1"
@@ -105,50 +140,98 @@ run_benchmark()
     local decompressed="$TEST_DIR/${name}_out.fastq"
     local compress_rss_file="$TEST_DIR/${name}_compress_rss.txt"
     local decompress_rss_file="$TEST_DIR/${name}_decompress_rss.txt"
+    local stderr_file="$TEST_DIR/${name}_stderr.txt"
     
     local input_size=$(stat -c%s "$input" 2>/dev/null || stat -f%z "$input")
-    local input_mb=$(echo "scale=2; $input_size / 1048576" | bc)
+    # bc drops the leading zero below 1 (".99"), which is not a valid JSON number,
+    # so every value that reaches benchmarks.jsonl is normalised through printf.
+    local input_mb
+    printf -v input_mb '%.2f' "$(echo "scale=2; $input_size / 1048576" | bc)"
+    # Count real bases once per input; the generator always emits 4-line records.
+    local input_bases=$(awk 'NR % 4 == 2 { bases += length($0) } END { print bases + 0 }' "$input")
     
     log_bench "Benchmark: $name (${input_mb} MiB, profile=${profile})"
+
+    # Optionally pin fqc to a fixed CPU list so the scheduler cannot migrate the
+    # reader/writer threads between repeats.
+    local -a pin=()
+    if [[ -n "$FQC_PERF_CPUSET" ]]; then
+        pin=(taskset -c "$FQC_PERF_CPUSET")
+    fi
+
+    local -a compress_cmd=("${pin[@]}" "$FQC_BIN" -q --memory-limit "$FQC_PERF_MEMORY_MIB" compress
+        -i "$input" -o "$compressed" --profile "$profile" -f)
+    local -a decompress_cmd=("${pin[@]}" "$FQC_BIN" -q --memory-limit "$FQC_PERF_MEMORY_MIB" decompress
+        -i "$compressed" -o "$decompressed" -f)
+
+    # Untimed warm-up runs fault in the binary, input pages and output extents so
+    # the first timed repeat is not a cold-cache outlier.
+    for ((iteration = 1; iteration <= FQC_PERF_WARMUP; ++iteration)); do
+        if ! "${compress_cmd[@]}" 2>"$stderr_file"; then
+            report_failure "$name" compression "$stderr_file"
+            return 1
+        fi
+    done
     
-    # Compress. Use the median wall time and maximum RSS across repeats.
+    # Compress. Use the median wall time (integer microseconds) and maximum RSS
+    # across repeats.
     local -a compress_times=()
     local compress_rss_kib=0
     for ((iteration = 1; iteration <= FQC_PERF_REPEATS; ++iteration)); do
-        local start_time=$(date +%s.%N)
-        /usr/bin/time -f '%M' -o "$compress_rss_file" \
-            "$FQC_BIN" -q --memory-limit "$FQC_PERF_MEMORY_MIB" compress \
-            -i "$input" -o "$compressed" --profile "$profile" -f 2>/dev/null
-        local end_time=$(date +%s.%N)
-        compress_times+=("$(echo "$end_time - $start_time" | bc)")
+        # EPOCHREALTIME avoids forking date(1) inside the timed window.
+        local start_us=${EPOCHREALTIME/[.,]/}
+        if ! /usr/bin/time -f '%M' -o "$compress_rss_file" \
+            "${compress_cmd[@]}" 2>"$stderr_file"; then
+            report_failure "$name" compression "$stderr_file"
+            return 1
+        fi
+        local end_us=${EPOCHREALTIME/[.,]/}
+        compress_times+=("$((end_us - start_us))")
         local current_rss=$(<"$compress_rss_file")
         if ((current_rss > compress_rss_kib)); then
             compress_rss_kib=$current_rss
         fi
     done
-    local compress_time=$(median_value "${compress_times[@]}")
+    local compress_us=$(median_value "${compress_times[@]}")
+    require_positive_time "$name" compression "$compress_us" || return 1
     
     local compressed_size=$(stat -c%s "$compressed" 2>/dev/null || stat -f%z "$compressed")
-    local ratio=$(echo "scale=4; $input_size / $compressed_size" | bc)
-    local compress_speed=$(echo "scale=2; $input_mb / $compress_time" | bc)
+    local ratio
+    printf -v ratio '%.4f' "$(echo "scale=4; $input_size / $compressed_size" | bc)"
+    local bits_per_base
+    printf -v bits_per_base '%.4f' "$(echo "scale=6; $compressed_size * 8 / $input_bases" | bc)"
+    local compress_speed
+    printf -v compress_speed '%.2f' \
+        "$(echo "scale=2; $input_size * 1000000 / (1048576 * $compress_us)" | bc)"
     
-    # Decompress with the same median/max aggregation.
+    # Decompress with the same warm-up and median/max aggregation.
+    for ((iteration = 1; iteration <= FQC_PERF_WARMUP; ++iteration)); do
+        if ! "${decompress_cmd[@]}" 2>"$stderr_file"; then
+            report_failure "$name" decompression "$stderr_file"
+            return 1
+        fi
+    done
     local -a decompress_times=()
     local decompress_rss_kib=0
     for ((iteration = 1; iteration <= FQC_PERF_REPEATS; ++iteration)); do
-        start_time=$(date +%s.%N)
-        /usr/bin/time -f '%M' -o "$decompress_rss_file" \
-            "$FQC_BIN" -q --memory-limit "$FQC_PERF_MEMORY_MIB" decompress \
-            -i "$compressed" -o "$decompressed" -f 2>/dev/null
-        end_time=$(date +%s.%N)
-        decompress_times+=("$(echo "$end_time - $start_time" | bc)")
+        start_us=${EPOCHREALTIME/[.,]/}
+        if ! /usr/bin/time -f '%M' -o "$decompress_rss_file" \
+            "${decompress_cmd[@]}" 2>"$stderr_file"; then
+            report_failure "$name" decompression "$stderr_file"
+            return 1
+        fi
+        end_us=${EPOCHREALTIME/[.,]/}
+        decompress_times+=("$((end_us - start_us))")
         current_rss=$(<"$decompress_rss_file")
         if ((current_rss > decompress_rss_kib)); then
             decompress_rss_kib=$current_rss
         fi
     done
-    local decompress_time=$(median_value "${decompress_times[@]}")
-    local decompress_speed=$(echo "scale=2; $input_mb / $decompress_time" | bc)
+    local decompress_us=$(median_value "${decompress_times[@]}")
+    require_positive_time "$name" decompression "$decompress_us" || return 1
+    local decompress_speed
+    printf -v decompress_speed '%.2f' \
+        "$(echo "scale=2; $input_size * 1000000 / (1048576 * $decompress_us)" | bc)"
 
     if ! cmp -s "$input" "$decompressed"; then
         echo "Error: round-trip mismatch for benchmark '$name'" >&2
@@ -156,12 +239,12 @@ run_benchmark()
     fi
     
     # Output results
-    printf "  %-20s %8.2f MiB  ratio: %.4f  compress: %6.2f MiB/s (%s KiB)  decompress: %6.2f MiB/s (%s KiB)\n" \
-           "$name" "$input_mb" "$ratio" "$compress_speed" "$compress_rss_kib" \
+    printf "  %-20s %8.2f MiB  ratio: %.4f  bits/base: %.4f  compress: %6.2f MiB/s (%s KiB)  decompress: %6.2f MiB/s (%s KiB)\n" \
+           "$name" "$input_mb" "$ratio" "$bits_per_base" "$compress_speed" "$compress_rss_kib" \
            "$decompress_speed" "$decompress_rss_kib"
     
     # JSON output
-    echo "{\"name\":\"$name\",\"profile\":\"$profile\",\"data\":\"$FQC_PERF_DATA\",\"input_mib\":$input_mb,\"ratio\":$ratio,\"compress_speed_mib_s\":$compress_speed,\"decompress_speed_mib_s\":$decompress_speed,\"compress_max_rss_kib\":$compress_rss_kib,\"decompress_max_rss_kib\":$decompress_rss_kib}" >> "$RESULTS_DIR/benchmarks.jsonl"
+    echo "{\"name\":\"$name\",\"profile\":\"$profile\",\"data\":\"$FQC_PERF_DATA\",\"input_mib\":$input_mb,\"ratio\":$ratio,\"bits_per_base\":$bits_per_base,\"compress_speed_mib_s\":$compress_speed,\"decompress_speed_mib_s\":$decompress_speed,\"compress_max_rss_kib\":$compress_rss_kib,\"decompress_max_rss_kib\":$decompress_rss_kib}" >> "$RESULTS_DIR/benchmarks.jsonl"
 
     if [[ "$FQC_PERF_ENFORCE_SLA" == "1" ]]; then
         if (( $(echo "$compress_speed < $FQC_PERF_MIN_COMPRESS_MIB_S" | bc -l) )); then
@@ -175,7 +258,7 @@ run_benchmark()
     fi
     
     if [[ "$FQC_PERF_KEEP_TEMP" != "1" ]]; then
-        rm -f "$compressed" "$decompressed"
+        rm -f "$compressed" "$decompressed" "$stderr_file"
     fi
 }
 
@@ -185,6 +268,10 @@ main()
         echo "Error: FQC_PERF_REPEATS must be a positive integer" >&2
         exit 1
     fi
+    if ! [[ "$FQC_PERF_WARMUP" =~ ^[0-9]+$ ]]; then
+        echo "Error: FQC_PERF_WARMUP must be a non-negative integer" >&2
+        exit 1
+    fi
     echo "========================================"
     echo "fq-compressor Performance Tests"
     echo "========================================"
@@ -195,6 +282,24 @@ main()
         echo "Error: fqc binary not found at $FQC_BIN"
         exit 1
     fi
+
+    if [[ -z "${EPOCHREALTIME:-}" ]]; then
+        echo "Error: bash 5.0+ is required (EPOCHREALTIME)" >&2
+        exit 1
+    fi
+
+    # Probe external tools once instead of failing midway through a benchmark.
+    local tool
+    for tool in bc python3 /usr/bin/time; do
+        if ! command -v "$tool" >/dev/null 2>&1; then
+            echo "Error: required tool not found: $tool" >&2
+            exit 1
+        fi
+    done
+    if [[ -n "$FQC_PERF_CPUSET" ]] && ! command -v taskset >/dev/null 2>&1; then
+        echo "Error: FQC_PERF_CPUSET requires taskset" >&2
+        exit 1
+    fi
     
     mkdir -p "$RESULTS_DIR"
     echo "# Benchmark results $(date -Iseconds)" > "$RESULTS_DIR/benchmarks.jsonl"